@@ -1,4 +1,5 @@
 from PIL import Image, ImageDraw
+from epilepsy_metrics import *
 
 TRANSPARENT = (0, 0, 0, 0)
 
@@ -21,12 +22,14 @@ def circular_mask(x,y,diameter,size):
 
     return image
 
+@timed_stage('crop_snap')
 def crop_snap(snap, coordinates: tuple, image_type=None):
     '''
     Expects tuple of (left, top, right, bottom) pixel values in original img
     '''
 
     cropped_image = Image.open(snap).crop(coordinates)
+    increment('images_decoded_total')
 
     if image_type == 'SENSOR_MAP':
         cropped_image = cropped_image.convert('RGBA')
@@ -0,0 +1,219 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+METRICS_JSON = 'msi_metrics.json'
+METRICS_PROM = 'msi_metrics.prom'
+METRICS_PREFIX = 'msi_'
+
+# upper bounds in seconds, +Inf is implied
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+METRIC_HELP = {
+    'runs_total': ('counter', 'Completed generator runs'),
+    'slides_total': ('counter', 'Slides generated per data type'),
+    'images_decoded_total': ('counter', 'Snapshot images decoded by crop_snap'),
+    'image_encoded_bytes_total': ('counter', 'PNG bytes encoded by image_to_stream'),
+    'deck_bytes_total': ('counter', 'Bytes written to output decks'),
+    'stage_seconds': ('histogram', 'Wall time per pipeline stage'),
+    'peak_rss_bytes': ('gauge', 'Peak resident set size of the last run'),
+    'deck_bytes': ('gauge', 'Size of the last output deck'),
+    'last_run_timestamp_seconds': ('gauge', 'Unix time the last run finished')
+}
+
+METRIC_LABELS = {
+    'slides_total': 'data_type',
+    'stage_seconds': 'stage'
+}
+
+run_metrics = {
+    'counters': {},
+    'gauges': {},
+    'histograms': {}
+}
+
+def new_histogram():
+    return {
+        'buckets': [0] * len(STAGE_BUCKETS),
+        'count': 0,
+        'sum': 0.0
+    }
+
+def increment(name, amount=1, label=''):
+    counter = run_metrics['counters'].setdefault(name, {})
+    counter[label] = counter.get(label, 0) + amount
+
+def set_gauge(name, value, label=''):
+    run_metrics['gauges'].setdefault(name, {})[label] = value
+
+def observe(name, value, label=''):
+    histogram = run_metrics['histograms'].setdefault(name, {})
+    series = histogram.setdefault(label, new_histogram())
+
+    for i in range(len(STAGE_BUCKETS)):
+        if value <= STAGE_BUCKETS[i]:
+            series['buckets'][i] += 1
+
+    series['count'] += 1
+    series['sum'] += value
+
+@contextmanager
+def timed(stage):
+    '''
+    Records the wall time of the enclosed block under stage_seconds
+    '''
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        observe('stage_seconds', time.perf_counter() - start, stage)
+
+def timed_stage(stage):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak
+
+    return peak * 1024
+
+def record_deck(deck_path):
+    deck_size = os.path.getsize(deck_path)
+    increment('deck_bytes_total', deck_size)
+    set_gauge('deck_bytes', deck_size)
+
+def load_totals(json_path):
+    if not os.path.exists(json_path):
+        return {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+    with open(json_path) as json_file:
+        return json.load(json_file)
+
+def merge_totals(totals, current):
+    '''
+    Adds the counters and histograms of the current run to the stored totals
+    Gauges are replaced by the current run's values
+    '''
+    for name, series in current['counters'].items():
+        stored = totals['counters'].setdefault(name, {})
+        for label, value in series.items():
+            stored[label] = stored.get(label, 0) + value
+
+    for name, series in current['histograms'].items():
+        stored = totals['histograms'].setdefault(name, {})
+        for label, histogram in series.items():
+            merged = stored.setdefault(label, new_histogram())
+
+            if len(merged['buckets']) != len(histogram['buckets']):
+                merged.update(new_histogram())
+
+            for i in range(len(histogram['buckets'])):
+                merged['buckets'][i] += histogram['buckets'][i]
+
+            merged['count'] += histogram['count']
+            merged['sum'] += histogram['sum']
+
+    for name, series in current['gauges'].items():
+        totals['gauges'].setdefault(name, {}).update(series)
+
+    return totals
+
+def format_labels(name, label, extra=None):
+    pairs = []
+
+    if label:
+        pairs.append(f'{METRIC_LABELS[name]}="{label}"')
+
+    if extra:
+        pairs.append(extra)
+
+    if not pairs:
+        return ''
+
+    return '{' + ','.join(pairs) + '}'
+
+def format_prometheus(totals):
+    lines = []
+
+    for name, (metric_type, help_text) in METRIC_HELP.items():
+        group = totals[metric_type + 's']
+
+        if name not in group:
+            continue
+
+        full_name = METRICS_PREFIX + name
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {metric_type}')
+
+        for label, value in sorted(group[name].items()):
+            if metric_type != 'histogram':
+                lines.append(f'{full_name}{format_labels(name, label)} {value}')
+                continue
+
+            for bound, count in zip(STAGE_BUCKETS, value['buckets']):
+                bucket_labels = format_labels(name, label, f'le="{bound}"')
+                lines.append(f'{full_name}_bucket{bucket_labels} {count}')
+
+            bucket_labels = format_labels(name, label, 'le="+Inf"')
+            lines.append(f'{full_name}_bucket{bucket_labels} {value["count"]}')
+            lines.append(f'{full_name}_sum{format_labels(name, label)} {value["sum"]}')
+            lines.append(f'{full_name}_count{format_labels(name, label)} {value["count"]}')
+
+    return '\n'.join(lines) + '\n'
+
+def write_atomic(path, text):
+    # the textfile collector may read at any time, never expose a partial file
+    temporary_path = path + '.tmp'
+
+    with open(temporary_path, 'w') as output_file:
+        output_file.write(text)
+
+    os.replace(temporary_path, path)
+
+def emit_metrics(directory):
+    '''
+    Folds this run into the running totals stored in directory
+    Writes the totals as a JSON summary and a Prometheus textfile collector file
+    '''
+    increment('runs_total')
+    set_gauge('last_run_timestamp_seconds', round(time.time(), 3))
+
+    peak_rss = peak_rss_bytes()
+
+    if peak_rss is not None:
+        set_gauge('peak_rss_bytes', peak_rss)
+
+    os.makedirs(directory, exist_ok=True)
+    json_path = os.path.join(directory, METRICS_JSON)
+    totals = merge_totals(load_totals(json_path), run_metrics)
+
+    write_atomic(json_path, json.dumps(totals, indent=4, sort_keys=True) + '\n')
+    write_atomic(os.path.join(directory, METRICS_PROM), format_prometheus(totals))
+
+    for group in run_metrics.values():
+        group.clear()
+
+    return totals
@@ -5,9 +5,11 @@ from epilepsy_crop import *
 def initialize_slide(template, master_slide):
     return template.slides.add_slide(master_slide)
 
+@timed_stage('image_to_stream')
 def image_to_stream(image_object):
     stream = BytesIO()
     image_object.save(stream, "PNG")
+    increment('image_encoded_bytes_total', stream.getbuffer().nbytes)
     return stream
 
 def insert_image(current_slide, placeholder, img):
@@ -154,6 +156,7 @@ def populate_labels(current_slide):
     for key in PLACEHOLDERS['TEXTBOX']:
         insert_text(current_slide, *PLACEHOLDERS['TEXTBOX'][key])
 
+@timed_stage('create_slide')
 def create_slide(presentation, slide_type, images, header, event_types):
     """
     """
@@ -178,5 +181,6 @@ def create_slide(presentation, slide_type, images, header, event_types):
 
     populate_legend(current_slide, event_types, slide_type)
     populate_demographics(current_slide, header)
+    increment('slides_total', label=slide_type)
 
     return current_slide
@@ -8,6 +8,8 @@ DATE_FORMAT = re.compile(r"\d{1,2}/\d{1,2}/\d{4}$")
 parser = argparse.ArgumentParser()
 parser.add_argument('-i', '--ica', action='store_true',
                     help='include ICA in event legend')
+parser.add_argument('-m', '--metrics', metavar='DIR',
+                    help='accumulate run metrics as JSON and Prometheus textfile in DIR')
 args = parser.parse_args()
 
 def prompt(prompt_str):
@@ -163,6 +165,7 @@ def get_data_files(data_type: str) -> list:
 
     return sorted_files
 
+@timed_stage('evaluate_folder')
 def evaluate_folder():
     """
     """
@@ -189,6 +192,7 @@ def generate_epilepsy_results(presentation):
             - if present, add to legend on each slide
                 * exclude SAM from legend for sef, cor, motor slides
     4. Save presentation
+    5. If requested, write run metrics
     '''
 
     patient_info = get_demographics()
@@ -217,6 +221,11 @@ def generate_epilepsy_results(presentation):
             for i in range(len(file_names[key])):
                 create_slide(presentation, key, file_names[key][i], patient_info, legend_types)
 
-    presentation.save(final_prs_name)
+    with timed('save'):
+        presentation.save(final_prs_name)
+
+    if args.metrics:
+        record_deck(final_prs_name)
+        emit_metrics(args.metrics)
 
 generate_epilepsy_results(Presentation('epi-template.pptx'))